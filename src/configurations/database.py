@@ -28,9 +28,18 @@ def global_init() -> None:
         return
 
     if not __async_engine:
-        __async_engine = create_async_engine(url=SQLALCHEMY_DATABASE_URL, echo=True)
+        __async_engine = create_async_engine(
+            url=SQLALCHEMY_DATABASE_URL,
+            echo=True,
+            pool_size=settings.max_connection_count,
+            max_overflow=settings.max_overflow_count,
+            pool_timeout=settings.pool_timeout,
+            pool_recycle=settings.pool_recycle,
+            pool_pre_ping=True,
+        )
 
-    __session_factory = async_sessionmaker(__async_engine)
+    # Объекты не протухают после commit, поэтому их можно отдавать в ответ без повторного SELECT
+    __session_factory = async_sessionmaker(__async_engine, expire_on_commit=False)
 
 
 async def get_async_session() -> AsyncGenerator:
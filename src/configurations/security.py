@@ -1,12 +1,18 @@
+import asyncio
+import os
+import threading
+import time
 from datetime import datetime, timedelta
+from hashlib import blake2b
 from typing import Annotated
 
+import bcrypt
+import jwt
+from cachetools import TLRUCache, TTLCache
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
-from passlib.context import CryptContext
 from pydantic import BaseModel
-from sqlalchemy import select
+from sqlalchemy import Row, bindparam, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.configurations.database import get_async_session
@@ -16,40 +22,79 @@ from src.models.sellers import Seller
 SECRET_KEY = "your-secret-key"  # Change this in production!
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+_KEY = SECRET_KEY.encode()
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+BCRYPT_ROUNDS = 12
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/token")
 
+# Statements are built once and executed with an "email" parameter
+_SELLER_BY_EMAIL = select(Seller).where(Seller.email == bindparam("email"))
+_CREDENTIALS_BY_EMAIL = select(Seller.id, Seller.email, Seller.password).where(
+    Seller.email == bindparam("email")
+)
+
+# Decoded token payloads: blake2b(token) -> (email, exp).
+# An entry lives at most PAYLOAD_CACHE_TTL seconds and never outlives the token itself.
+PAYLOAD_CACHE_TTL = 30
+
+
+def _payload_ttu(_key: bytes, value: tuple[str, float], now: float) -> float:
+    return min(now + PAYLOAD_CACHE_TTL, value[1])
+
+
+_payload_cache = TLRUCache(maxsize=10000, ttu=_payload_ttu, timer=time.time)
+
+# Password check results: keyed blake2b(plain, hash) -> bool. Short TTL, so password changes apply quickly.
+# The per-process key keeps the cached digests from being brute-forced offline without bcrypt's cost.
+# verify_password runs in worker threads, hence the lock.
+_verify_cache = TTLCache(maxsize=1024, ttl=60)
+_VERIFY_KEY = os.urandom(32)
+_verify_lock = threading.Lock()
+
+# Authenticated sellers: email -> detached Seller. Must be invalidated on seller update/delete.
+_user_cache = TTLCache(maxsize=5000, ttl=60)
+
 
 class Token(BaseModel):
     access_token: str
     token_type: str
 
 
-class TokenData(BaseModel):
-    email: str | None = None
-
-
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    plain, hashed = plain_password.encode("utf-8"), hashed_password.encode("utf-8")
+    key = blake2b(b"\0".join((plain, hashed)), digest_size=16, key=_VERIFY_KEY).digest()
+    with _verify_lock:
+        cached = _verify_cache.get(key)
+    if cached is not None:
+        return cached
+
+    verified = bcrypt.checkpw(plain, hashed)
+    with _verify_lock:
+        _verify_cache[key] = verified
+    return verified
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode("utf-8")
 
 
-async def authenticate_seller(email: str, password: str, session: AsyncSession) -> Seller | None:
-    query = select(Seller).where(Seller.email == email)
-    result = await session.execute(query)
-    seller = result.scalar_one_or_none()
+async def authenticate_seller(email: str, password: str, session: AsyncSession) -> Row | None:
+    # Login needs only the credentials, not a full ORM Seller
+    result = await session.execute(_CREDENTIALS_BY_EMAIL, {"email": email})
+    seller = result.first()
     
     if not seller:
         return None
-    if not verify_password(password, seller.password):
+    # bcrypt is CPU-bound, keep it off the event loop
+    if not await asyncio.to_thread(verify_password, password, seller.password):
         return None
     return seller
 
 
+def forget_seller(email: str) -> None:
+    _user_cache.pop(email, None)
+
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -57,7 +102,7 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, _KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
@@ -71,19 +116,33 @@ async def get_current_seller(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
+    key = blake2b(token.encode(), digest_size=16).digest()
+    if cached := _payload_cache.get(key):
+        email = cached[0]
+    else:
+        try:
+            payload = jwt.decode(
+                token,
+                key=_KEY,
+                algorithms=[ALGORITHM],
+                options={"require": ["exp", "sub"]},
+            )
+            email: str = payload["sub"]
+        except jwt.InvalidTokenError:
             raise credentials_exception
-        token_data = TokenData(email=email)
-    except JWTError:
-        raise credentials_exception
-        
-    query = select(Seller).where(Seller.email == token_data.email)
-    result = await session.execute(query)
-    seller = result.scalar_one_or_none()
-    
+        # Only successfully verified tokens get here
+        _payload_cache[key] = (email, payload["exp"])
+
+    seller = _user_cache.get(email)
     if seller is None:
-        raise credentials_exception
-    return seller 
\ No newline at end of file
+        result = await session.execute(_SELLER_BY_EMAIL, {"email": email})
+        seller = result.scalar_one_or_none()
+
+        if seller is None:
+            raise credentials_exception
+        # Cache a detached instance so it is not expired by this session's commit
+        session.expunge(seller)
+        _user_cache[email] = seller
+
+    # Attach a copy to the current session without hitting the DB
+    return await session.merge(seller, load=False) 
\ No newline at end of file
@@ -8,7 +8,10 @@ class Settings(BaseSettings):
     db_username: str
     db_password: str
     db_test_name: str = "fastapi_project_test_db"
-    max_connection_count: int = 10
+    max_connection_count: int = 20
+    max_overflow_count: int = 20
+    pool_timeout: int = 30
+    pool_recycle: int = 1800
 
     @property
     def database_url(self) -> str:
@@ -1,4 +1,4 @@
-from sqlalchemy import String, ForeignKey
+from sqlalchemy import Index, String, ForeignKey
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import BaseModel
@@ -6,6 +6,14 @@ from .base import BaseModel
 
 class Book(BaseModel):
     __tablename__ = "books"
+    # Covering index: books of a seller are served by an index-only scan on PostgreSQL
+    __table_args__ = (
+        Index(
+            "ix_books_seller_id_include",
+            "seller_id",
+            postgresql_include=["title", "author", "year", "pages"],
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     title: Mapped[str] = mapped_column(String(50), nullable=False)
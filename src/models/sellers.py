@@ -14,10 +14,10 @@ class Seller(BaseModel):
     email: Mapped[str] = mapped_column(String(100), unique=True)
     password: Mapped[str] = mapped_column(String(1024))
     
-    # Relationship with books
+    # Relationship with books. Never loaded implicitly: endpoints opt in via loader options
     books = relationship(
         "Book",
         back_populates="seller",
         cascade="all, delete",
-        lazy="selectin"
+        lazy="raise",
     ) 
\ No newline at end of file
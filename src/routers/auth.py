@@ -12,6 +12,7 @@ from src.configurations.security import (
     create_access_token,
     ACCESS_TOKEN_EXPIRE_MINUTES,
 )
+from src.schemas.sellers import PASSWORD_MAX_BYTES
 
 router = APIRouter(tags=["authentication"])
 
@@ -21,6 +22,12 @@ async def login_for_access_token(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     session: Annotated[AsyncSession, Depends(get_async_session)],
 ):
+    # Не гоняем bcrypt на заведомо невалидных паролях
+    if len(form_data.password.encode("utf-8")) > PASSWORD_MAX_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Password is too long",
+        )
     seller = await authenticate_seller(form_data.username, form_data.password, session)
     if not seller:
         raise HTTPException(
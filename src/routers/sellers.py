@@ -1,17 +1,25 @@
+import asyncio
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, selectinload
 
 from src.configurations.database import get_async_session
-from src.configurations.security import get_current_seller, get_password_hash
+from src.configurations.security import (
+    forget_seller,
+    get_current_seller,
+    get_password_hash,
+)
 from src.models.sellers import Seller
 from src.schemas.sellers import (
     SellerCreate,
     SellerResponse,
     SellerDetailResponse,
+    SellerListAdapter,
     SellerUpdate,
 )
 
@@ -23,36 +31,32 @@ async def create_seller(
     seller: SellerCreate,
     session: Annotated[AsyncSession, Depends(get_async_session)],
 ):
+    # Hash the password in a thread while the session checks out a connection
+    hashed_password, _ = await asyncio.gather(
+        asyncio.to_thread(get_password_hash, seller.password),
+        session.connection(),
+    )
+    seller_data = seller.model_dump()
+    seller_data["password"] = hashed_password
+
+    # Конфликт по email не откатывает транзакцию: INSERT просто не вернет строку
+    stmt = (
+        insert(Seller)
+        .values(**seller_data)
+        .on_conflict_do_nothing(index_elements=[Seller.email])
+        .returning(Seller)
+    )
+
     try:
-        # Hash the password
-        hashed_password = get_password_hash(seller.password)
-        seller_data = seller.model_dump()
-        seller_data["password"] = hashed_password
-        
-        new_seller = Seller(**seller_data)
-        session.add(new_seller)
-        await session.commit()
-        await session.refresh(new_seller)  # Обновляем объект после коммита
-        return new_seller
+        # RETURNING уже заполнил объект, коммит сделает get_async_session
+        new_seller = await session.scalar(stmt)
     except IntegrityError:
-        # Проверим, существует ли уже продавец с таким email
+        # Нарушено какое-то другое ограничение БД
         await session.rollback()
-        query = select(Seller).where(Seller.email == seller.email)
-        result = await session.execute(query)
-        existing_seller = result.scalar_one_or_none()
-        
-        if existing_seller:
-            # Если продавец с таким email уже существует, возвращаем его
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail=f"Seller with email {seller.email} already exists"
-            )
-        else:
-            # Если ошибка другая, возвращаем общую ошибку
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Could not create seller due to database constraints"
-            )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Could not create seller due to database constraints"
+        )
     except Exception as e:
         await session.rollback()
         raise HTTPException(
@@ -60,15 +64,31 @@ async def create_seller(
             detail=f"An unexpected error occurred: {str(e)}"
         )
 
+    if new_seller is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Seller with email {seller.email} already exists"
+        )
+
+    return new_seller
+
 
 @router.get("", response_model=list[SellerResponse])
 async def get_sellers(
     session: Annotated[AsyncSession, Depends(get_async_session)],
+    limit: Annotated[int, Query(ge=1, le=200)] = 50,
+    offset: Annotated[int, Query(ge=0)] = 0,
 ):
-    query = select(Seller)
+    query = select(Seller).order_by(Seller.id).limit(limit).offset(offset)
     result = await session.execute(query)
     sellers = result.scalars().all()
-    return sellers
+    # Отдаем готовый JSON, чтобы FastAPI не валидировал список повторно
+    return Response(
+        content=SellerListAdapter.dump_json(
+            SellerListAdapter.validate_python(sellers, from_attributes=True)
+        ),
+        media_type="application/json",
+    )
 
 
 @router.get("/{seller_id}", response_model=SellerDetailResponse)
@@ -77,9 +97,10 @@ async def get_seller(
     session: Annotated[AsyncSession, Depends(get_async_session)],
     current_seller: Annotated[Seller, Depends(get_current_seller)],
 ):
-    query = select(Seller).where(Seller.id == seller_id)
+    # Книги нужны в ответе, подтягиваем их тем же запросом
+    query = select(Seller).options(joinedload(Seller.books)).where(Seller.id == seller_id)
     result = await session.execute(query)
-    seller = result.scalar_one_or_none()
+    seller = result.unique().scalar_one_or_none()
     
     if not seller:
         raise HTTPException(status_code=404, detail="Seller not found")
@@ -97,19 +118,17 @@ async def update_seller(
     if seller_id != current_seller.id:
         raise HTTPException(status_code=403, detail="Not authorized to update this seller")
     
-    query = select(Seller).where(Seller.id == seller_id)
-    result = await session.execute(query)
-    seller = result.scalar_one_or_none()
-    
-    if not seller:
-        raise HTTPException(status_code=404, detail="Seller not found")
+    # get_current_seller already loaded this seller into the session
+    seller = current_seller
     
     # Update only provided fields
+    old_email = seller.email
     update_data = seller_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(seller, field, value)
     
     await session.commit()
+    forget_seller(old_email)
     return seller
 
 
@@ -122,12 +141,15 @@ async def delete_seller(
     if seller_id != current_seller.id:
         raise HTTPException(status_code=403, detail="Not authorized to delete this seller")
     
-    query = select(Seller).where(Seller.id == seller_id)
+    # Книги удаляются каскадом, поэтому загружаем их заранее
+    query = select(Seller).options(selectinload(Seller.books)).where(Seller.id == seller_id)
     result = await session.execute(query)
     seller = result.scalar_one_or_none()
     
     if not seller:
         raise HTTPException(status_code=404, detail="Seller not found")
     
+    email = seller.email
     await session.delete(seller)
-    await session.commit() 
\ No newline at end of file
+    await session.commit()
+    forget_seller(email) 
\ No newline at end of file
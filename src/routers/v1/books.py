@@ -3,17 +3,20 @@
 # sys.path.append("..")
 # from main import app
 
+import logging
 from typing import Annotated
-from fastapi import APIRouter, Depends, Response, status, HTTPException
-from sqlalchemy import select
+
+from fastapi import APIRouter, Body, Depends, Query, Response, status, HTTPException
+from sqlalchemy import insert, select
 from src.models.books import Book
 from src.models.sellers import Seller
-from src.schemas import IncomingBook, ReturnedAllbooks, ReturnedBook
-from icecream import ic
+from src.schemas import BULK_MAX_BOOKS, IncomingBook, ReturnedAllbooks, ReturnedBook
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.configurations import get_async_session
 from src.configurations.security import get_current_seller
 
+logger = logging.getLogger(__name__)
+
 books_router = APIRouter(tags=["books"], prefix="/books")
 
 # CRUD - Create, Read, Update, Delete
@@ -45,13 +48,43 @@ async def create_book(
     return new_book
 
 
-# Ручка, возвращающая все книги
+# Ручка для массового создания книг. Все книги вставляются одним INSERT ... RETURNING.
+# Размер пачки ограничен, чтобы один запрос не мог вставить сколько угодно строк.
+@books_router.post(
+    "/bulk", response_model=list[ReturnedBook], status_code=status.HTTP_201_CREATED
+)
+async def create_books_bulk(
+    books: Annotated[list[IncomingBook], Body(max_length=BULK_MAX_BOOKS)],
+    session: DBSession,
+    current_seller: Annotated[Seller, Depends(get_current_seller)],
+):
+    if not books:
+        return []
+
+    rows = [book.model_dump() | {"seller_id": current_seller.id} for book in books]
+    stmt = insert(Book).returning(Book, sort_by_parameter_order=True)
+    result = await session.scalars(stmt, rows)
+
+    return result.all()
+
+
+# Ручка, возвращающая все книги постранично
 @books_router.get("/", response_model=ReturnedAllbooks)
-async def get_all_books(session: DBSession):
-    query = select(Book)
+async def get_all_books(
+    session: DBSession,
+    limit: Annotated[int, Query(ge=1, le=200)] = 50,
+    offset: Annotated[int, Query(ge=0)] = 0,
+):
+    query = select(Book).order_by(Book.id).limit(limit).offset(offset)
     result = await session.execute(query)
     books = result.scalars().all()
-    return {"books": books}
+    # Отдаем готовый JSON, чтобы FastAPI не валидировал список повторно
+    return Response(
+        content=ReturnedAllbooks.model_validate(
+            {"books": books}, from_attributes=True
+        ).model_dump_json(),
+        media_type="application/json",
+    )
 
 
 # Ручка для получения книги по ее ИД
@@ -71,7 +104,6 @@ async def delete_book(
     current_seller: Annotated[Seller, Depends(get_current_seller)],
 ):
     deleted_book = await session.get(Book, book_id)
-    ic(deleted_book)
 
     if not deleted_book:
         return Response(status_code=status.HTTP_404_NOT_FOUND)
@@ -82,6 +114,7 @@ async def delete_book(
             detail="Not authorized to delete this book"
         )
     
+    logger.debug("Deleting book %s", deleted_book.id)
     await session.delete(deleted_book)
 
 
@@ -1,7 +1,10 @@
 from pydantic import BaseModel, Field, field_validator
 from pydantic_core import PydanticCustomError
 
-__all__ = ["IncomingBook", "ReturnedBook", "ReturnedAllbooks"]
+__all__ = ["IncomingBook", "ReturnedBook", "ReturnedAllbooks", "BULK_MAX_BOOKS"]
+
+# Сколько книг можно создать одним запросом на массовое создание
+BULK_MAX_BOOKS = 100
 
 
 # Базовый класс "Книги", содержащий поля, которые есть во всех классах-наследниках.
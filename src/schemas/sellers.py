@@ -1,4 +1,8 @@
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, TypeAdapter, field_validator
+from pydantic_core import PydanticCustomError
+
+# bcrypt использует только первые 72 байта пароля, длиннее не принимаем
+PASSWORD_MAX_BYTES = 72
 
 
 class SellerBase(BaseModel):
@@ -8,7 +12,15 @@ class SellerBase(BaseModel):
 
 
 class SellerCreate(SellerBase):
-    password: str = Field(..., min_length=6)
+    password: str = Field(..., min_length=6, max_length=PASSWORD_MAX_BYTES)
+
+    @field_validator("password")  # max_length считает символы, а ограничение bcrypt в байтах
+    @staticmethod
+    def validate_password_bytes(val: str):
+        if len(val.encode("utf-8")) > PASSWORD_MAX_BYTES:
+            raise PydanticCustomError("Validation error", "Password is too long!")
+
+        return val
 
 
 class SellerUpdate(SellerBase):
@@ -35,5 +47,9 @@ class SellerResponse(SellerBase):
         from_attributes = True
 
 
+# Валидирует и сериализует список продавцов за один проход в pydantic-core
+SellerListAdapter = TypeAdapter(list[SellerResponse])
+
+
 class SellerDetailResponse(SellerResponse):
     books: list[BookInSeller] = [] 
\ No newline at end of file
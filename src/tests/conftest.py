@@ -3,67 +3,173 @@
 Сам пайтест подтягивает их по имени из файла conftest.py
 """
 
-import asyncio
+import itertools
+import os
+import sys
+from datetime import timedelta
+
+# Не пишем .pyc при импортах во время тестов (в том числе в воркерах xdist)
+os.environ.setdefault("PYTHONDONTWRITEBYTECODE", "1")
+sys.dont_write_bytecode = True
 
 import httpx
 import pytest
 import pytest_asyncio
+from sqlalchemy import event, text
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
 
+from src.configurations import security
+from src.configurations.security import (
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    create_access_token,
+    get_password_hash,
+)
 from src.configurations.settings import settings
 from src.models import books  # noqa
 from src.models.base import BaseModel
 from src.models.books import Book  # noqa F401
+from src.models.sellers import Seller
 
 # Переопределяем движок для запуска тестов и подключаем его к тестовой базе.
 # Это решает проблему с сохранностью данных в основной базе приложения.
 # Фикстуры тестов их не зачистят.
 # и обеспечивает чистую среду для запуска тестов. В ней не будет лишних записей.
-async_test_engine = create_async_engine(
-    settings.database_test_url,
-    echo=True,
-)
+#
+# При параллельном запуске (pytest -n auto) каждый воркер pytest-xdist работает
+# в своей схеме тестовой БД, чтобы воркеры не мешали друг другу.
+#
+# С PYTEST_FAST=1 тесты идут на SQLite в памяти: без сети и fsync, но и без
+# проверки PostgreSQL-специфичного поведения.
+_fast = os.environ.get("PYTEST_FAST") == "1"
+_xdist_worker = os.environ.get("PYTEST_XDIST_WORKER")
+_test_schema = f"test_{_xdist_worker}" if _xdist_worker and not _fast else None
+
+if _fast:
+    # StaticPool держит одно соединение, иначе у каждого соединения будет своя пустая БД
+    async_test_engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
+        echo=True,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+
+    # pysqlite сам управляет транзакциями и ломает SAVEPOINT. Отключаем это
+    # и начинаем транзакции сами. Заодно включаем проверку внешних ключей, как в PostgreSQL.
+    @event.listens_for(async_test_engine.sync_engine, "connect")
+    def _sqlite_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    @event.listens_for(async_test_engine.sync_engine, "begin")
+    def _sqlite_begin(connection):
+        connection.exec_driver_sql("BEGIN")
+
+else:
+    # Тесты идут последовательно, поэтому небольшого пула без overflow хватает.
+    # Соединения переиспользуются всю сессию, pre-ping на каждый checkout не нужен.
+    async_test_engine = create_async_engine(
+        settings.database_test_url,
+        echo=True,
+        pool_size=5,
+        max_overflow=0,
+        pool_pre_ping=False,
+        connect_args=(
+            {"server_settings": {"search_path": _test_schema}} if _test_schema else {}
+        ),
+    )
 
 # Создаем фабрику сессий для тестового движка.
 async_test_session = async_sessionmaker(
     async_test_engine, expire_on_commit=False, autoflush=False
 )
 
+# Стойкость хешей в тестах не важна: минимальная стоимость bcrypt (4) вместо 12
+# ускоряет каждое хеширование и проверку пароля примерно в 250 раз.
+security.BCRYPT_ROUNDS = 4
 
-# Получаем цикл событий для асинхорнного потока выполнения задач.
-@pytest_asyncio.fixture(scope="session")
-def event_loop():
-    """Create an instance of the default event loop for each test case."""
-    # loop = asyncio.new_event_loop() # На разных версиях питона и разных ОС срабатывает по разному
-    loop = asyncio.get_event_loop()
-    yield loop
-    loop.close()
+# Хеши bcrypt считаются один раз на весь прогон, а не в каждой фикстуре.
+# Тестовые модули импортируют их отсюда.
+SECRET123_HASH = get_password_hash("secret123")
+OTHER_PASSWORD_HASH = get_password_hash("other_password")
+
+# Счетчик для уникальных email. pid различает воркеры xdist, а таблицы
+# пересоздаются на каждый прогон, поэтому этого достаточно.
+_email_seq = itertools.count()
+
+
+def unique_email(prefix: str) -> str:
+    return f"{prefix}{os.getpid()}_{next(_email_seq)}@example.com"
 
 
 # Создаем таблицы в тестовой БД. Предварительно удаляя старые.
+# Схему воркера xdist создаем перед тестами и удаляем после.
 @pytest_asyncio.fixture(scope="session", autouse=True)
-async def create_tables() -> None:
+async def create_tables():
     """Create tables in DB."""
     async with async_test_engine.begin() as connection:
-        # Сначала используем raw SQL для удаления старых таблиц с каскадом
-        try:
-            await connection.execute("DROP TABLE IF EXISTS books_table CASCADE")
-            await connection.execute("DROP TABLE IF EXISTS books CASCADE")
-            await connection.execute("DROP TABLE IF EXISTS sellers CASCADE")
-        except Exception as e:
-            print(f"Error dropping tables: {e}")
+        if _test_schema:
+            await connection.execute(text(f"CREATE SCHEMA IF NOT EXISTS {_test_schema}"))
+
+        # Сначала используем raw SQL для удаления старых таблиц с каскадом.
+        # База SQLite в памяти всегда пустая, удалять в ней нечего.
+        if not _fast:
+            try:
+                await connection.execute(text("DROP TABLE IF EXISTS books_table CASCADE"))
+                await connection.execute(text("DROP TABLE IF EXISTS books CASCADE"))
+                await connection.execute(text("DROP TABLE IF EXISTS sellers CASCADE"))
+            except Exception as e:
+                print(f"Error dropping tables: {e}")
         
         # Затем создаем новые таблицы через ORM
         await connection.run_sync(BaseModel.metadata.create_all)
 
+    yield
+
+    if _test_schema:
+        async with async_test_engine.begin() as connection:
+            await connection.execute(text(f"DROP SCHEMA IF EXISTS {_test_schema} CASCADE"))
 
-# Создаем сессию для БД используемую для тестов
+    # Закрываем соединения пула, иначе поток aiosqlite не дает интерпретатору завершиться
+    await async_test_engine.dispose()
+
+
+# Тестовый продавец создается один раз на весь прогон и коммитится в БД.
+# Тесты получают его через фикстуру test_seller, все их изменения откатываются.
+@pytest_asyncio.fixture(scope="session")
+async def _seller_row(create_tables) -> Seller:
+    async with async_test_session() as session:
+        seller = Seller(
+            first_name="John",
+            last_name="Doe",
+            email="john.doe@example.com",
+            password=SECRET123_HASH,
+        )
+        session.add(seller)
+        await session.commit()
+    return seller
+
+
+# Создаем сессию для БД используемую для тестов.
+# Весь тест идет внутри внешней транзакции, а commit() в тестах и в приложении
+# фиксирует только SAVEPOINT. По окончании теста внешняя транзакция откатывается.
 @pytest_asyncio.fixture(scope="function")
 async def db_session():
     async with async_test_engine.connect() as connection:
-        async with async_test_session(bind=connection) as session:
+        transaction = await connection.begin()
+        async with async_test_session(
+            bind=connection, join_transaction_mode="create_savepoint"
+        ) as session:
             yield session
-            await session.rollback()
+        await transaction.rollback()
+
+
+# Подключаем заранее созданного продавца к сессии теста без запроса в БД
+@pytest_asyncio.fixture(scope="function")
+async def test_seller(db_session, _seller_row) -> Seller:
+    return await db_session.merge(_seller_row, load=False)
 
 
 # Коллбэк для переопределения сессии в приложении
@@ -87,11 +193,24 @@ def test_app(override_get_async_session):
     return app
 
 
-# создаем асинхронного клиента для ручек
+# создаем асинхронного клиента для ручек.
+# ASGITransport вызывает приложение напрямую в том же цикле событий, без сокетов;
+# редиректы (например, 307 на путь со слешем) клиент проходит сам.
 @pytest_asyncio.fixture(scope="function")
 async def async_client(test_app):
     transport = httpx.ASGITransport(app=test_app)
     async with httpx.AsyncClient(
-        transport=transport, base_url="http://127.0.0.1:8000"
+        transport=transport, base_url="http://test", follow_redirects=True
     ) as test_client:
         yield test_client
+
+
+# Заголовки авторизации для тестового продавца. Токен подписываем напрямую тем же ключом,
+# что и приложение: ручку /token (и bcrypt) проверяют тесты в test_auth.py.
+@pytest.fixture(scope="session")
+def auth_headers(_seller_row) -> dict[str, str]:
+    token = create_access_token(
+        {"sub": _seller_row.email},
+        expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
+    )
+    return {"Authorization": f"Bearer {token}"}